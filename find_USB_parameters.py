@@ -1,117 +1,221 @@
 #! .venv/bin/python3
 """Tool to find USB parameters for a connecting to a Renogy USB device."""
 
+from __future__ import annotations
+
+import json
 import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING
+
+from util import set_low_latency
 
-import minimalmodbus
+# minimalmodbus (and pyserial with it) is imported where it is used to keep
+# start-up fast.
+if TYPE_CHECKING:
+    import minimalmodbus
 
 log = logging.getLogger(__name__)
 
+# Range of valid Modbus slave addresses.
+MIN_SLAVE_ADDRESS = 1
+MAX_SLAVE_ADDRESS = 247
+
+# Slave addresses tried before the rest of the address range: the Renogy
+# default (1), the commonly configured addresses 16 and 17 and the factory
+# address (247).
+PREFERRED_ADDRESSES = (1, 16, 17, 247)
+
+# Slave addresses in probing order.
+CANDIDATE_ADDRESSES = (
+    *PREFERRED_ADDRESSES,
+    *(
+        a
+        for a in range(MIN_SLAVE_ADDRESS, MAX_SLAVE_ADDRESS + 1)
+        if a not in PREFERRED_ADDRESSES
+    ),
+)
+
+# Register read to probe for a device (start of the product model string).
+PROBE_REGISTER = 0x000C
+
+# Serial settings of the Renogy RS232 port (8N1)
+BAUDRATE = 9600
+BITS_PER_CHARACTER = 10
+
+# Length of the response to a single register read: address, function code,
+# byte count, two data bytes and the CRC.
+PROBE_RESPONSE_BYTES = 7
+
+# Time allowed for the device to start answering a request, on top of the
+# response transmission time.
+RESPONSE_MARGIN = 0.04
+
+# USB vendor and product ID of the FTDI FT231X USB UART in the cable.
+FTDI_VID = 0x0403
+FT231X_PID = 0x6015
+
+# Detected parameters are cached here to skip the slave scan on restart.
+CACHE_FILE = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+    "renogy-mqtt",
+    "params.json",
+)
+
+# Environment variables to set the serial port and slave address instead of
+# detecting them
+PORT_ENV = "RENOGY_PORT"
+SLAVE_ID_ENV = "RENOGY_SLAVE_ID"
+
+# Searches for the Modbus parameters in progress, by strict flag
+_search_lock = threading.Lock()
+_searches_in_progress: dict[bool, Future[dict]] = {}
+# Held while a search uses the serial ports
+_scan_lock = threading.Lock()
+
+
+class DeviceNotFoundError(ValueError):
+    """No FTDI USB device or no responding charge controller was found.
+
+    Unlike other errors from the search, this may clear up by itself, e.g.
+    once the cable is plugged in or the charge controller is powered.
+    """
+
 
 def _setup_instrument(portname: str) -> minimalmodbus.Instrument:
-    instrument = minimalmodbus.Instrument(portname, slaveaddress=247)
+    import minimalmodbus
+
+    instrument = minimalmodbus.Instrument(
+        portname, slaveaddress=247, close_port_after_each_call=False
+    )
     if instrument.serial is None:
-        log.error(f"Failed to open serial port: {portname}")
+        log.error("Failed to open serial port: %s", portname)
         raise ValueError(
             f"Failed to open serial port: {portname}. "
             "Please check the connection."
         )
-    instrument.serial.baudrate = 9600
-    instrument.serial.timeout = 0.1
+    instrument.serial.baudrate = BAUDRATE
+    # Wait no longer than a response takes to arrive, so that silent
+    # addresses are skipped quickly
+    instrument.serial.timeout = (
+        PROBE_RESPONSE_BYTES * BITS_PER_CHARACTER / BAUDRATE + RESPONSE_MARGIN
+    )
+    instrument.serial.write_timeout = 0.1
+    instrument.serial.exclusive = True  # Keep other processes off the bus
+    set_low_latency(instrument.serial)
     return instrument
 
 
 def _scan_addresses(
-    instrument: minimalmodbus.Instrument, registers_to_try: list, verbose: bool
+    instrument: minimalmodbus.Instrument,
+    verbose: bool,
+    strict: bool,
+    stop_event: threading.Event | None,
 ) -> list:
     addresses = []
-    for address in range(0x01, 0xFF):
+    for address in CANDIDATE_ADDRESSES:
+        if stop_event is not None and stop_event.is_set():
+            break
         if verbose:
-            logging.debug(f"Testing slave address: {address}")
+            logging.debug("Testing slave address: %s", address)
         instrument.address = address
-        for register, length in registers_to_try:
-            try:
-                if _try_read_register(instrument, register, length):
-                    addresses.append(address)
-                    break  # Found one, move to next address
-            except (minimalmodbus.ModbusException, UnicodeDecodeError):
-                continue
+        if _try_read_register(instrument, PROBE_REGISTER):
+            addresses.append(address)
+            if not strict:
+                break  # Only one device should answer on the bus
     return addresses
 
 
-def find_slave_address(portname: str, verbose: bool = False) -> int:
-    """Find the slave addresses for a Modbus device.
+def find_slave_address(
+    portname: str,
+    verbose: bool = False,
+    strict: bool = False,
+    stop_event: threading.Event | None = None,
+) -> int:
+    """Find the slave address for a Modbus device.
+
+    The scan stops at the first address that responds unless strict is set.
 
     Args:
         portname: The name of the serial port.
         verbose: If True, enable verbose logging.
+        strict: If True, scan all addresses and fail if more than one
+            device responds.
+        stop_event: If given, the scan is abandoned when the event is set.
 
     Returns:
-        list: List of found slave addresses.
+        int: The found slave address.
 
     Raises:
-        ValueError: If no slave addresses are found or if multiple addresses
-          are found.
+        DeviceNotFoundError: If no slave addresses are found.
+        ValueError: If multiple addresses are found in strict mode.
     """
     if verbose:
-        logging.debug(f"Searching for slave address on port: {portname}")
+        logging.debug("Searching for slave address on port: %s", portname)
 
     instrument = _setup_instrument(portname)
-    registers_to_try = [(0x1402, 8), (0x000C, 16)]
-    addresses = _scan_addresses(instrument, registers_to_try, verbose)
+    addresses = _scan_addresses(instrument, verbose, strict, stop_event)
 
     if not addresses:
-        raise ValueError(
+        raise DeviceNotFoundError(
             "No slave addresses found. Please check the connection."
         )
 
     if len(addresses) > 1:
         raise ValueError(
-            "Multiple slave addresses found. Please check the connection."
+            f"Multiple slave addresses found: {addresses}. "
+            "Please check the connection."
         )
 
     if verbose:
-        logging.debug(f"Found slave address: {addresses[0]}")
+        logging.debug("Found slave address: %s", addresses[0])
     return addresses[0]
 
 
 def _try_read_register(
-    instrument: minimalmodbus.Instrument, register: int, length: int
+    instrument: minimalmodbus.Instrument, register: int
 ) -> bool:
-    """Try to read a register from the Modbus device.
+    """Try to read a single register from the Modbus device.
+
+    An exception response from the slave also counts as a success, since it
+    shows that a device answers at the instrument's address.
 
     Args:
         instrument (minimalmodbus.Instrument): The Modbus instrument to read
             from.
         register (int): The register address to read.
-        length (int): The length of the data to read.
 
     Returns:
-        bool: True if the read was successful, False otherwise.
+        bool: True if the device responded, False otherwise.
     """
+    import minimalmodbus
+
     try:
-        result = instrument.read_string(register, length)
-        logging.debug(f"Successfully read register {register}: {result}")
+        result = instrument.read_register(register, functioncode=3)
+    except minimalmodbus.SlaveReportedException as e:
+        logging.debug("Device rejected register %s: %s", register, e)
         return True
-    except (minimalmodbus.ModbusException, UnicodeDecodeError) as e:
-        logging.debug(f"Error reading register {register}: {e}")
+    except minimalmodbus.ModbusException as e:
+        logging.debug("Error reading register %s: %s", register, e)
         return False
+    logging.debug("Successfully read register %s: %s", register, result)
+    return True
 
 
-def find_usb_device(verbose: bool = False) -> str:
-    """Find the USB port for the FTDI device.
-
-    Developed to detect a FTDI USB device connected to the system.
-    Cable used in development: https://www.amazon.com/dp/B07JGRJR4V
+def _find_ftdi_ports(verbose: bool = False) -> list[tuple[str, str | None]]:
+    """Find all FTDI USB serial ports.
 
     Args:
         verbose (bool): If True, enable verbose logging.
 
     Returns:
-        str: The USB port of the FDTI device.
+        list[tuple[str, str | None]]: The device path and the USB serial
+            number of each FTDI device.
 
     Raises:
-        ValueError: If no or multiple FTDI USB device is found.
+        DeviceNotFoundError: If no FTDI USB device is found.
     """
     import serial.tools.list_ports
 
@@ -120,41 +224,403 @@ def find_usb_device(verbose: bool = False) -> str:
     # List all serial ports
     ports = serial.tools.list_ports.comports()
 
-    device: list = [
-        port.device for port in ports if "FT231X USB UART" in port.description
+    devices = [
+        (port.device, port.serial_number)
+        for port in ports
+        if port.vid == FTDI_VID and port.pid == FT231X_PID
     ]
 
-    if len(device) == 0:
-        raise ValueError("No FTDI USB device found. Please connect the device.")
+    if not devices:
+        raise DeviceNotFoundError(
+            "No FTDI USB device found. Please connect the device."
+        )
+
+    if verbose:
+        for device, _ in devices:
+            logging.debug("Found USB device: %s", device)
+    return devices
 
-    if len(device) > 1:
+
+def _find_ftdi_port(verbose: bool = False) -> tuple[str, str | None]:
+    """Find the FTDI USB serial port.
+
+    Args:
+        verbose (bool): If True, enable verbose logging.
+
+    Returns:
+        tuple[str, str | None]: The device path and the USB serial number of
+            the FTDI device.
+
+    Raises:
+        DeviceNotFoundError: If no FTDI USB device is found.
+        ValueError: If multiple FTDI USB devices are found.
+    """
+    devices = _find_ftdi_ports(verbose)
+    if len(devices) > 1:
         raise ValueError(
             "Multiple FTDI USB devices found. Please disconnect all but one."
         )
+    return devices[0]
 
-    if verbose:
-        logging.debug(f"Found USB device: {device[0]}")
-    return device[0]
+
+def find_usb_device(verbose: bool = False) -> str:
+    """Find the USB port for the FTDI device.
+
+    Developed to detect a FTDI USB device connected to the system.
+    Cable used in development: https://www.amazon.com/dp/B07JGRJR4V
+
+    Args:
+        verbose (bool): If True, enable verbose logging.
+
+    Returns:
+        str: The USB port of the FDTI device.
+
+    Raises:
+        ValueError: If no or multiple FTDI USB device is found.
+    """
+    return _find_ftdi_port(verbose)[0]
+
+
+def _is_slave_address(value: object) -> bool:
+    """Check that a value is a valid Modbus slave address.
+
+    Args:
+        value (object): The value to check.
+
+    Returns:
+        bool: True if the value is an int in the range 1 to 247.
+    """
+    return (
+        isinstance(value, int)
+        and not isinstance(value, bool)
+        and MIN_SLAVE_ADDRESS <= value <= MAX_SLAVE_ADDRESS
+    )
 
 
-def find_modbus_parameters(verbose: bool = False) -> dict:
+def _load_cached_slave_address(usb_serial: str | None) -> int | None:
+    """Load the cached slave address for a FTDI device.
+
+    Args:
+        usb_serial (str | None): The USB serial number of the FTDI device.
+
+    Returns:
+        int | None: The cached slave address, or None if not cached.
+    """
+    if usb_serial is None:
+        return None
+    try:
+        with open(CACHE_FILE) as f:
+            cache = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.debug("No usable parameter cache at %s: %s", CACHE_FILE, e)
+        return None
+    if not isinstance(cache, dict) or cache.get("ftdi_serial") != usb_serial:
+        return None
+    slave_address = cache.get("slave_address")
+    if not _is_slave_address(slave_address):
+        logging.debug("Invalid cached slave address: %r", slave_address)
+        return None
+    return slave_address
+
+
+def _save_cached_slave_address(
+    usb_serial: str | None, device: str, slave_address: int
+) -> None:
+    """Save the slave address found for a FTDI device to the cache file.
+
+    Args:
+        usb_serial (str | None): The USB serial number of the FTDI device.
+        device (str): The path to the serial port.
+        slave_address (int): The slave address found on the device.
+    """
+    if (
+        usb_serial is None
+        or _load_cached_slave_address(usb_serial) == slave_address
+    ):
+        return
+    try:
+        os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+        with open(CACHE_FILE, "w") as f:
+            json.dump(
+                {
+                    "ftdi_serial": usb_serial,
+                    "device": device,
+                    "slave_address": slave_address,
+                },
+                f,
+            )
+    except OSError as e:
+        log.warning("Could not write parameter cache %s: %s", CACHE_FILE, e)
+
+
+def _find_port_parameters(
+    device: str,
+    usb_serial: str | None,
+    verbose: bool,
+    strict: bool,
+    stop_event: threading.Event | None = None,
+) -> dict:
+    """Find the slave address of the device on one FTDI port.
+
+    The result is not written to the cache, that is left to the caller.
+
+    Args:
+        device (str): The path to the serial port.
+        usb_serial (str | None): The USB serial number of the FTDI device.
+        verbose (bool): If True, enable verbose logging.
+        strict (bool): If True, ignore the cache and scan all addresses.
+        stop_event (threading.Event | None): If given, the scan is abandoned
+            when the event is set.
+
+    Returns:
+        dict: A dictionary containing the USB device and slave address.
+
+    Raises:
+        DeviceNotFoundError: If no slave address is found.
+        ValueError: If more than one slave address is found in strict mode.
+    """
+    slave_address = None if strict else _load_cached_slave_address(usb_serial)
+    if slave_address is not None:
+        instrument = _setup_instrument(device)
+        instrument.address = slave_address
+        if _try_read_register(instrument, PROBE_REGISTER):
+            if verbose:
+                logging.debug("Using cached slave address: %s", slave_address)
+            return {"device": device, "slave_address": slave_address}
+
+    slave_address = find_slave_address(device, verbose, strict, stop_event)
+    return {"device": device, "slave_address": slave_address}
+
+
+def _probe_ports(
+    devices: list[tuple[str, str | None]], verbose: bool, strict: bool
+) -> dict:
+    """Find the charge controller among several FTDI ports.
+
+    The ports are scanned concurrently. Without strict, the first port with
+    a responding device is used and the scans of the other ports are
+    stopped. Only the selected port's result is written to the cache.
+
+    Args:
+        devices (list[tuple[str, str | None]]): The device path and USB serial
+            number of each FTDI port.
+        verbose (bool): If True, enable verbose logging.
+        strict (bool): If True, wait for all scans and fail unless exactly
+            one port has a device.
+
+    Returns:
+        dict: A dictionary containing the USB device and slave address.
+
+    Raises:
+        DeviceNotFoundError: If no port has a responding device.
+        ValueError: If in strict mode more than one port has a responding
+            device.
+    """
+    stop_event = threading.Event()
+    found: list[tuple[dict, str | None]] = []
+    with ThreadPoolExecutor(max_workers=len(devices)) as executor:
+        futures = {
+            executor.submit(
+                _find_port_parameters,
+                device,
+                usb_serial,
+                verbose,
+                strict,
+                stop_event,
+            ): usb_serial
+            for device, usb_serial in devices
+        }
+        try:
+            for future in as_completed(futures):
+                try:
+                    found.append((future.result(), futures[future]))
+                except (OSError, DeviceNotFoundError) as e:
+                    logging.debug("No charge controller found: %s", e)
+                    continue
+                if not strict:
+                    break
+        finally:
+            # Abandon the remaining scans, the executor waits for them
+            stop_event.set()
+
+    if not found:
+        raise DeviceNotFoundError(
+            "No slave addresses found on any FTDI USB device. "
+            "Please check the connection."
+        )
+    if len(found) > 1:
+        raise ValueError(
+            "Devices found on multiple FTDI USB ports: "
+            f"{[parameters for parameters, _ in found]}. "
+            "Please disconnect all but one."
+        )
+    parameters, usb_serial = found[0]
+    _save_cached_slave_address(
+        usb_serial, parameters["device"], parameters["slave_address"]
+    )
+    return parameters
+
+
+def find_modbus_parameters(verbose: bool = False, strict: bool = False) -> dict:
     """Find the Modbus parameters for the Renogy USB device.
 
+    The slave address found for a FTDI device is cached on disk, keyed by the
+    USB serial number, and verified with a single read on the next start
+    before falling back to a full scan. If several FTDI devices are
+    connected, they are scanned concurrently.
+
+    The serial port and slave address can be fixed with the RENOGY_PORT and
+    RENOGY_SLAVE_ID environment variables; only the part that is not set is
+    detected. If only the slave address is set and there are several FTDI
+    devices, the one on which it responds is used.
+
+    Only one search runs at a time in a process. Callers arriving while a
+    search with the same strict flag is in progress wait for it and get its
+    result (their verbose flag is ignored); a search with the other strict
+    flag runs after the current one.
+
     Args:
         verbose (bool): If True, enable verbose logging.
+        strict (bool): If True, ignore the cache and scan all addresses,
+            failing if more than one device responds.
 
     Returns:
         dict: A dictionary containing the USB device and slave address.
+
+    Raises:
+        DeviceNotFoundError: If no FTDI USB device or no responding charge
+            controller is found, or RENOGY_PORT does not exist.
+        ValueError: If RENOGY_SLAVE_ID is invalid, or the result
+            is ambiguous, e.g. several responding devices in strict mode.
     """
+    with _search_lock:
+        search = _searches_in_progress.get(strict)
+        running = search is not None
+        if search is None:
+            search = _searches_in_progress[strict] = Future()
+    if running:
+        return search.result()
+
+    try:
+        with _scan_lock:
+            parameters = _find_modbus_parameters(verbose, strict)
+    except BaseException as e:
+        search.set_exception(e)
+        raise
+    else:
+        search.set_result(parameters)
+        return parameters
+    finally:
+        with _search_lock:
+            del _searches_in_progress[strict]
+
+
+def _read_environment() -> tuple[str | None, int | None]:
+    """Read the serial port and slave address set in the environment.
+
+    Returns:
+        tuple[str | None, int | None]: The serial port and slave address, or
+            None for each one that is not set.
+
+    Raises:
+        ValueError: If RENOGY_SLAVE_ID is not a slave address from 1 to 247.
+        DeviceNotFoundError: If RENOGY_PORT does not exist (yet), e.g. while
+            the adapter is unplugged.
+    """
+    slave_id = os.environ.get(SLAVE_ID_ENV) or None
+    slave_address = None
+    if slave_id is not None:
+        try:
+            slave_address = int(slave_id)
+        except ValueError:
+            pass
+        if not _is_slave_address(slave_address):
+            raise ValueError(
+                f"{SLAVE_ID_ENV}={slave_id!r} is not a slave address from "
+                f"{MIN_SLAVE_ADDRESS} to {MAX_SLAVE_ADDRESS}."
+            )
+
+    device = os.environ.get(PORT_ENV) or None
+    if device is not None and not os.path.exists(device):
+        raise DeviceNotFoundError(f"{PORT_ENV}={device!r} does not exist.")
+    return device, slave_address
+
+
+def _find_port_with_slave(
+    devices: list[tuple[str, str | None]], slave_address: int, verbose: bool
+) -> str:
+    """Find the FTDI port on which a slave address responds.
+
+    With a single FTDI device, it is used without probing.
+
+    Args:
+        devices (list[tuple[str, str | None]]): The device path and USB serial
+            number of each FTDI port.
+        slave_address (int): The slave address to look for.
+        verbose (bool): If True, enable verbose logging.
+
+    Returns:
+        str: The path to the serial port.
+
+    Raises:
+        DeviceNotFoundError: If the slave address responds on no port.
+        ValueError: If the slave address responds on more than one port.
+    """
+    if len(devices) == 1:
+        return devices[0][0]
+
+    responding = []
+    for device, _ in devices:
+        instrument = _setup_instrument(device)
+        instrument.address = slave_address
+        if _try_read_register(instrument, PROBE_REGISTER):
+            responding.append(device)
     if verbose:
-        device = find_usb_device(verbose)
-        slave_address = find_slave_address(device, verbose)
-        logging.debug("\n")
+        logging.debug(
+            "Slave address %s responds on: %s", slave_address, responding
+        )
+
+    if not responding:
+        raise DeviceNotFoundError(
+            f"Slave address {slave_address} does not respond on any FTDI "
+            "USB device. Please check the connection."
+        )
+    if len(responding) > 1:
+        raise ValueError(
+            f"Slave address {slave_address} responds on multiple FTDI USB "
+            f"devices: {responding}. Please set {PORT_ENV}."
+        )
+    return responding[0]
+
+
+def _find_modbus_parameters(verbose: bool, strict: bool) -> dict:
+    device, slave_address = _read_environment()
+    if slave_address is not None:
+        if device is None:
+            device = _find_port_with_slave(
+                _find_ftdi_ports(verbose), slave_address, verbose
+            )
+        if verbose:
+            logging.debug(
+                "Using %s and slave address %s", device, slave_address
+            )
+        return {"device": device, "slave_address": slave_address}
+    if device is not None:
+        return _find_port_parameters(device, None, verbose, strict)
+
+    devices = _find_ftdi_ports(verbose)
+    if len(devices) == 1:
+        device, usb_serial = devices[0]
+        parameters = _find_port_parameters(device, usb_serial, verbose, strict)
+        _save_cached_slave_address(
+            usb_serial, device, parameters["slave_address"]
+        )
     else:
-        device = find_usb_device()
-        slave_address = find_slave_address(device)
+        parameters = _probe_ports(devices, verbose, strict)
+    if verbose:
+        logging.debug("\n")
 
-    return {"device": device, "slave_address": slave_address}
+    return parameters
 
 
 if __name__ == "__main__":
@@ -172,11 +638,18 @@ if __name__ == "__main__":
         default=False,
         help="Enable verbose logging",
     )
-    verbose = parser.parse_args().verbose
+    parser.add_argument(
+        "--strict-scan",
+        action="store_true",
+        default=False,
+        help="Scan all slave addresses and fail if more than one responds",
+    )
+    args = parser.parse_args()
+    verbose = args.verbose
 
     if verbose:
         logging.debug("Searching for USB parameters...")
-        logging.debug(find_modbus_parameters(verbose))
+        logging.debug("%s", find_modbus_parameters(verbose, args.strict_scan))
 
     else:
-        logging.debug(find_modbus_parameters())
+        logging.debug("%s", find_modbus_parameters(strict=args.strict_scan))
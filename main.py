@@ -2,25 +2,66 @@
 
 """main entry point for running the renogy-mqtt application."""
 
+from __future__ import annotations
+
 import logging
-import time
-from typing import cast
+import signal
+import threading
+from typing import TYPE_CHECKING, Any, cast
 
-from find_USB_parameters import find_modbus_parameters
-from mqtt import QoSLevel
-from renogy_mqtt import RenogyChargeControllerMQTTClient
 from util import call_periodically
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format=(
-        "%(asctime)s - %(levelname)s - %(module)s.py:%(lineno)d - %(message)s"
-    ),
-    datefmt="%Y-%m-%d %H:%M:%S",
-)
+# The serial, Modbus and MQTT modules are imported in main() so that argument
+# errors and --help do not pay for loading them.
+if TYPE_CHECKING:
+    from mqtt import QoSLevel
+
 log = logging.getLogger(__name__)
 
+# First and longest wait in seconds between charge controller detection
+# attempts.
+DETECT_RETRY_MIN = 1.0
+DETECT_RETRY_MAX = 60.0
+
+
+def _detect_charge_controller(stop_event: threading.Event) -> dict | None:
+    """Detect the USB device and slave address, retrying until found.
+
+    Retries follow quickly at first, to pick up a cable that is being
+    plugged in, and back off exponentially to DETECT_RETRY_MAX. Only a
+    missing device and serial port errors are retried; other errors, such as
+    an ambiguous result, are raised.
+
+    Args:
+        stop_event (threading.Event): Stops retrying when set.
+
+    Returns:
+        dict | None: The USB device and slave address, or None if stopped.
+
+    Raises:
+        ValueError: If the search fails for a reason other than a missing
+            device.
+    """
+    from find_USB_parameters import DeviceNotFoundError, find_modbus_parameters
+
+    delay = DETECT_RETRY_MIN
+    while True:
+        try:
+            return find_modbus_parameters(verbose=True)
+        except DeviceNotFoundError as e:
+            log.warning(
+                "Charge controller not found, retrying in %ss: %s", delay, e
+            )
+        except OSError as e:
+            log.warning(
+                "Could not access the serial port, retrying in %ss: %s",
+                delay,
+                e,
+            )
+        if stop_event.wait(delay):
+            return None
+        delay = min(delay * 2, DETECT_RETRY_MAX)
+
 
 def main(
     broker: str,
@@ -29,6 +70,7 @@ def main(
     publish_frequency: int,
     qos: QoSLevel,
     max_queue_size: int,
+    full_publish_interval: int = 1,
 ) -> None:
     """Main function to start the renogy-mqtt application.
 
@@ -41,9 +83,36 @@ def main(
         publish_frequency (int): Frequency in seconds to publish data.
         qos (QoSLevel): Quality of Service level for the MQTT data messages.
         max_queue_size (int): Maximum size of the message queue.
+        full_publish_interval (int): Publish all fields every this many
+            publishes and only changed fields in between. Defaults to 1.
     """
+    from renogy_mqtt import RenogyChargeControllerMQTTClient
+
+    # Stop publishing and disconnect cleanly when systemd stops the service
+    stop_event = threading.Event()
+
+    def handle_sigterm(signum: int, frame: Any) -> None:
+        """Signal handler for SIGTERM.
+
+        Args:
+            signum (int): The signal number.
+            frame (Any): The current stack frame.
+        """
+        log.info("SIGTERM received. Shutting down...")
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
     log.debug("Auto-Detecting the USB and MODBUS addresses...")
-    modbus_params = find_modbus_parameters(verbose=True)
+    try:
+        modbus_params = _detect_charge_controller(stop_event)
+    except ValueError as e:
+        # Configuration errors and ambiguous results do not clear up by
+        # themselves, stop with an error instead of retrying
+        log.error("Cannot detect the charge controller: %s", e)
+        raise SystemExit(1) from e
+    if modbus_params is None:
+        return
     device_address = modbus_params["device"]
     slave_address = modbus_params["slave_address"]
 
@@ -56,24 +125,29 @@ def main(
             device_address=device_address,
             qos=qos,
             max_queue_size=max_queue_size,
+            full_publish_interval=full_publish_interval,
         ) as mqtt_client:
             # wait for the client to connect
-            while not mqtt_client.is_connected:
-                time.sleep(0.1)  # Small delay to prevent busy waiting
+            while not mqtt_client.wait_connected(timeout=10):
+                if stop_event.is_set():
+                    return
+                log.warning("Waiting for connection to the MQTT broker...")
 
             log.info("Starting renogy-mqtt application...")
 
             log.info(
-                f"Publishing data every {publish_frequency} seconds. "
-                "Press Ctrl+C to stop."
+                "Publishing data every %s seconds. Press Ctrl+C to stop.",
+                publish_frequency,
             )
             call_periodically(
                 function=mqtt_client.publish_data,
                 interval=publish_frequency,
+                stop_event=stop_event,
             )
-    except Exception as e:
-        log.error(f"An error occurred: {e}")
-        return
+    except Exception:
+        # Exit with an error so that systemd restarts the service
+        log.exception("An error occurred")
+        raise
     except KeyboardInterrupt:
         log.info("Keyboard interrupt received. Shutting down...")
 
@@ -81,6 +155,16 @@ def main(
 if __name__ == "__main__":
     import argparse
 
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format=(
+            "%(asctime)s - %(levelname)s - "
+            "%(module)s.py:%(lineno)d - %(message)s"
+        ),
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
     parser = argparse.ArgumentParser(
         description="Run the Renogy Charge Controller MQTT client."
     )
@@ -121,11 +205,20 @@ if __name__ == "__main__":
         default=1000,
         help="Maximum size of the message queue (default: 1000)",
     )
+    parser.add_argument(
+        "--full-publish-interval",
+        type=int,
+        default=1,
+        help=(
+            "Publish all fields every N publishes and only changed fields "
+            "in between (default: 1, always publish all fields)"
+        ),
+    )
     # Parse arguments ONCE
     args = parser.parse_args()
 
     # Cast the QoS to the correct type
-    qos_level = cast(QoSLevel, args.qos)
+    qos_level = cast("QoSLevel", args.qos)
 
     main(
         broker=args.broker,
@@ -134,4 +227,5 @@ if __name__ == "__main__":
         publish_frequency=args.publish_frequency,
         qos=qos_level,
         max_queue_size=args.max_queue_size,
+        full_publish_interval=args.full_publish_interval,
     )
@@ -3,6 +3,8 @@
 
 import json
 import logging
+import socket
+import threading
 from abc import ABC, abstractmethod
 from collections import deque
 from typing import Any, Literal, NamedTuple
@@ -13,19 +15,24 @@ log = logging.getLogger(__name__)
 
 QoSLevel = Literal[0, 1, 2]
 
+# Shared compact encoder for all JSON payloads.
+_encode_json = json.JSONEncoder(
+    ensure_ascii=False, separators=(",", ":")
+).encode
+
 
 class QueuedMessage(NamedTuple):
     """A named tuple to hold queued MQTT messages.
 
     Attributes:
         topic (str): The MQTT topic to publish to.
-        payload (str): The message payload to publish.
+        payload (bytes | str): The message payload to publish.
         qos (QoSLevel): Quality of Service level for the message.
         retain (bool): Whether to retain the message on the broker.
     """
 
     topic: str
-    payload: str
+    payload: bytes | str
     qos: QoSLevel
     retain: bool
 
@@ -36,6 +43,22 @@ class MQTTClient(ABC):
     Meant to be subclassed for specific data logging use cases.
     """
 
+    __slots__ = (
+        "broker",
+        "port",
+        "base_topic",
+        "name",
+        "keepalive",
+        "topic",
+        "status_topic",
+        "_full_topics",
+        "client",
+        "connected",
+        "_connected_event",
+        "_message_queue",
+        "_status_payloads",
+    )
+
     def __init__(
         self,
         broker: str,
@@ -56,9 +79,13 @@ class MQTTClient(ABC):
             keepalive (int): Keepalive interval in seconds. Defaults to 60.
                 Lower values make last will trigger faster but increase
                 network traffic.
-            max_queue_size (int): Maximum size of the message queue.
-                Defaults to 1000. If the queue is full, older messages will be
-                discarded to make room for new messages.
+            max_queue_size (int): Maximum number of outgoing messages paho
+                queues while they wait to be sent or for an in-flight slot.
+                Defaults to 1000. When the queue is full, paho rejects the
+                new message with MQTT_ERR_QUEUE_SIZE and it is dropped;
+                queued messages are kept. QoS 0 messages are not queued while
+                disconnected, and publish() drops data messages while the
+                client is not connected.
         """
         self.broker = broker
         self.port = port
@@ -67,21 +94,36 @@ class MQTTClient(ABC):
         self.keepalive = keepalive
         self.topic = f"{self.base_topic}/{self.name}"
         self.status_topic = f"{self.topic}/status"
-        self.client = mqtt.Client()
-        self._connected: bool = False
+        # Full topic strings by topic passed to publish()
+        self._full_topics: dict[str, str] = {}
+        self.client = mqtt.Client(
+            callback_api_version=mqtt.CallbackAPIVersion.VERSION2,
+            protocol=mqtt.MQTTv5,
+            transport="tcp",
+            reconnect_on_failure=True,
+        )
+        self.client.reconnect_delay_set(min_delay=1, max_delay=30)
+        self.client.max_inflight_messages_set(20)
+        self.client.max_queued_messages_set(max_queue_size)
+        # Whether the client is connected to the MQTT broker
+        self.connected: bool = False
+        self._connected_event = threading.Event()
         self._message_queue: deque[QueuedMessage] = deque(
             maxlen=max_queue_size
         )  # Limit queue size
         self._setup_callbacks()
-        self._set_last_will()
+        self._cache_status_payloads()
 
-        log.info(f"Initialized MQTT client for {name} at {broker}:{port}")
+        log.info("Initialized MQTT client for %s at %s:%s", name, broker, port)
 
     @abstractmethod
     def status_message(self, status: bool) -> dict:
         """Abstract method to get the status message.
 
         Used when publishing birth, last will, and disconnect messages.
+        Called once per status when the client is initialized; the result is
+        serialized and reused for every status message until the payloads are
+        rebuilt with _cache_status_payloads().
 
         Args:
             status (bool): The status of the client
@@ -116,71 +158,116 @@ class MQTTClient(ABC):
         """
         self.disconnect()
         if exc_type is not None:
-            log.error(f"An error occurred: {exc_value}")
+            log.error("An error occurred: %s", exc_value)
         log.info("Disconnected from MQTT broker.")
 
     def _setup_callbacks(self) -> None:
         """Set up MQTT client callbacks."""
+        self.client.on_connect = self._on_connect
+        self.client.on_disconnect = self._on_disconnect
 
-        def on_connect(
-            client: mqtt.Client, userdata: Any, flags: Any, rc: int
-        ) -> None:
-            """Callback for when the client connects to the broker.
+    def _on_connect(
+        self,
+        client: mqtt.Client,
+        userdata: Any,
+        flags: mqtt.ConnectFlags,
+        reason_code: mqtt.ReasonCode,
+        properties: mqtt.Properties | None,
+    ) -> None:
+        """Callback for when the client connects to the broker.
 
-            Args:
-                client (mqtt.Client): The MQTT client instance.
-                userdata (Any): User-defined data of any type.
-                flags (Any): Response flags sent by the broker.
-                rc (int): The connection return code.
-            """
-            if rc == 0:
-                self._connected = True
-                log.info(
-                    f"Connected to MQTT broker at {self.broker}:{self.port}"
-                )
-                # Send birth message only after successful connection
-                self.birth()
-                self._process_queued_messages()  # Send queued messages
-            else:
-                self._connected = False
-                log.error(
-                    f"Failed to connect to MQTT broker. Return code: {rc}"
-                )
+        Args:
+            client (mqtt.Client): The MQTT client instance.
+            userdata (Any): User-defined data of any type.
+            flags (mqtt.ConnectFlags): Response flags sent by the broker.
+            reason_code (mqtt.ReasonCode): The connection reason code.
+            properties (mqtt.Properties | None): The MQTT v5 properties
+                sent by the broker, if any.
+        """
+        if not reason_code.is_failure:
+            self.connected = True
+            self._connected_event.set()
+            log.info(
+                "Connected to MQTT broker at %s:%s", self.broker, self.port
+            )
+            self._set_tcp_nodelay()
+            # Send birth message only after successful connection
+            self.birth()
+            self._process_queued_messages()  # Send queued messages
+        else:
+            self.connected = False
+            self._connected_event.clear()
+            log.error(
+                "Failed to connect to MQTT broker. Reason code: %s",
+                reason_code,
+            )
 
-        def on_disconnect(client: mqtt.Client, userdata: Any, rc: int) -> None:
-            """Callback for when the client disconnects from the broker.
+    def _on_disconnect(
+        self,
+        client: mqtt.Client,
+        userdata: Any,
+        flags: mqtt.DisconnectFlags,
+        reason_code: mqtt.ReasonCode,
+        properties: mqtt.Properties | None,
+    ) -> None:
+        """Callback for when the client disconnects from the broker.
 
-            Args:
-                client (mqtt.Client): The MQTT client instance.
-                userdata (Any): User-defined data of any type.
-                rc (int): The disconnection return code.
-            """
-            self._connected = False
-            if rc == 0:
-                log.info(f"Disconnected from MQTT broker. Return code: {rc}")
-            else:
-                log.warning(
-                    "".join(
-                        [
-                            "Unexpected disconnection from MQTT broker. ",
-                            f"Return code: {rc}",
-                        ]
-                    )
-                )
+        Args:
+            client (mqtt.Client): The MQTT client instance.
+            userdata (Any): User-defined data of any type.
+            flags (mqtt.DisconnectFlags): The disconnection flags.
+            reason_code (mqtt.ReasonCode): The disconnection reason code.
+            properties (mqtt.Properties | None): The MQTT v5 properties
+                sent by the broker, if any.
+        """
+        self.connected = False
+        self._connected_event.clear()
+        if not reason_code.is_failure:
+            log.info(
+                "Disconnected from MQTT broker. Reason code: %s",
+                reason_code,
+            )
+        else:
+            log.warning(
+                "Unexpected disconnection from MQTT broker. Reason code: %s",
+                reason_code,
+            )
 
-        self.client.on_connect = on_connect
-        self.client.on_disconnect = on_disconnect
+    def _set_tcp_nodelay(self) -> None:
+        """Disable Nagle's algorithm on the broker connection.
+
+        Messages are small and sent one at a time, so holding them back to
+        coalesce with later data only adds latency.
+        """
+        sock = self.client.socket()
+        if sock is None:
+            return
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except (AttributeError, OSError) as e:
+            log.warning("Could not set TCP_NODELAY on MQTT socket: %s", e)
+
+    def _cache_status_payloads(self) -> None:
+        """Serialize the status messages and set the last will from them.
+
+        Status messages are expected to stay the same between calls, so they
+        are serialized once here instead of on every status publish.
+        """
+        self._status_payloads: dict[bool, bytes] = {
+            status: _encode_json(self.status_message(status)).encode()
+            for status in (True, False)
+        }
+        self._set_last_will()
 
     def _set_last_will(self) -> None:
         """Set the last will message for the MQTT client."""
-        payload = self.status_message(False)
         self.client.will_set(
-            self.status_topic, json.dumps(payload), qos=1, retain=True
+            self.status_topic, self._status_payloads[False], qos=1, retain=True
         )
 
     def connect(self) -> None:
         """Connect to the MQTT broker."""
-        if self._connected:
+        if self.connected:
             log.warning("Already connected to MQTT broker.")
             return
 
@@ -188,7 +275,7 @@ class MQTTClient(ABC):
             self.client.connect(self.broker, self.port, self.keepalive)
             self.client.loop_start()
         except Exception as e:
-            log.error(f"Error connecting to MQTT broker: {e}")
+            log.error("Error connecting to MQTT broker: %s", e)
             raise
 
     def publish_status(self, status: bool) -> None:
@@ -198,27 +285,32 @@ class MQTTClient(ABC):
             status (bool): The status of the client
                 (True for online, False for offline).
         """
-        payload = self.status_message(status)
+        payload = self._status_payloads[status]
         qos = 1  # Use QoS level 1 for status messages
         retain = True  # Retain the status message
         # Use the status topic directly without going through publish()
         try:
             result = self.client.publish(
-                self.status_topic, json.dumps(payload), qos=qos, retain=retain
+                self.status_topic, payload, qos=qos, retain=retain
             )
             if result.rc != mqtt.MQTT_ERR_SUCCESS:
-                log.error(f"Failed to publish status. Return code: {result.rc}")
-            else:
+                log.error(
+                    "Failed to publish status. Return code: %s", result.rc
+                )
+            elif log.isEnabledFor(logging.INFO):
                 log.info(
-                    f"{qos=} | {retain=} | "
-                    f"Published status to {self.status_topic}: {payload}"
+                    "qos=%s | retain=%s | Published status to %s: %s",
+                    qos,
+                    retain,
+                    self.status_topic,
+                    payload.decode(),
                 )
         except Exception as e:
-            log.error(f"Error publishing status: {e}")
+            log.error("Error publishing status: %s", e)
 
     def publish_json(
         self, payload: dict, topic: str, qos: QoSLevel = 0, retain: bool = False
-    ) -> None:
+    ) -> bool:
         """Publish JSON data to the specified topic.
 
         Args:
@@ -229,46 +321,52 @@ class MQTTClient(ABC):
             retain (bool): Whether to retain the message on the broker.
                 Defaults to False (do not retain).
 
+        Returns:
+            bool: True if the message was handed to paho for sending.
+
         Raises:
             TypeError: If the payload is not serializable to JSON.
-            json.JSONDecodeError: If the payload cannot be decoded as JSON.
-            Exception: For any other errors during publishing.
         """
         try:
-            self.publish(
-                payload=json.dumps(payload), topic=topic, qos=qos, retain=retain
+            return self.publish(
+                payload=_encode_json(payload),
+                topic=topic,
+                qos=qos,
+                retain=retain,
             )
 
         except TypeError as e:
-            log.error(f"TypeError while publishing JSON data: {e}")
-            raise
-
-        except json.JSONDecodeError as e:
-            log.error(f"JSONDecodeError while publishing JSON data: {e}")
-            raise
-
-        except Exception as e:
-            log.error(f"Error publishing JSON data: {e}")
+            log.error("TypeError while publishing JSON data: %s", e)
             raise
 
     def publish(
-        self, payload: str, topic: str, qos: QoSLevel = 0, retain: bool = False
-    ) -> None:
+        self,
+        payload: bytes | str,
+        topic: str,
+        qos: QoSLevel = 0,
+        retain: bool = False,
+    ) -> bool:
         """Publish data to the specified topic.
 
         Args:
-            payload (dict): The data to publish.
+            payload (bytes | str): The data to publish. Bytes are sent as-is,
+                strings are UTF-8 encoded by paho.
             topic (str): The MQTT topic to publish to.
             qos (int): Quality of Service level for the message.
                 Defaults to 0 (at most once).
             retain (bool): Whether to retain the message on the broker.
                 Defaults to False (do not retain).
+
+        Returns:
+            bool: True if the message was handed to paho for sending.
         """
-        full_topic = f"{self.base_topic}/{topic}"
+        full_topic = self._full_topics.get(topic)
+        if full_topic is None:
+            full_topic = self._full_topics[topic] = f"{self.base_topic}/{topic}"
 
-        if not self._connected:
+        if not self.connected:
             log.error("Cannot publish message, not connected to MQTT broker.")
-            return
+            return False
 
         try:
             result = self.client.publish(
@@ -276,51 +374,74 @@ class MQTTClient(ABC):
             )
             if result.rc != mqtt.MQTT_ERR_SUCCESS:
                 log.error(
-                    f"Failed to publish message. Return code: {result.rc}"
+                    "Failed to publish message. Return code: %s", result.rc
                 )
-            else:
+                return False
+            if log.isEnabledFor(logging.INFO):
                 log.info(
-                    f"{qos=} | {retain=} | "
-                    f"Published message to {full_topic}: {payload}"
+                    "qos=%s | retain=%s | Published message to %s: %s",
+                    qos,
+                    retain,
+                    full_topic,
+                    payload.decode() if isinstance(payload, bytes) else payload,
                 )
         except Exception as e:
-            log.error(f"Error publishing message: {e}")
+            log.error("Error publishing message: %s", e)
+            return False
+        return True
 
     def _process_queued_messages(self) -> None:
         """Send all queued messages after reconnection."""
-        while self._message_queue and self._connected:
+        while self._message_queue and self.connected:
             msg = self._message_queue.popleft()
             try:
                 result = self.client.publish(
                     msg.topic, msg.payload, qos=msg.qos, retain=msg.retain
                 )
                 log.info(
-                    f"Sent queued message to {msg.topic}"
-                    f" with result code {result.rc}"
+                    "Sent queued message to %s with result code %s",
+                    msg.topic,
+                    result.rc,
                 )
             except Exception as e:
                 log.error(
-                    f"Result code: {result.rc} "
-                    f"Failed to send queued message: {e}"
+                    "Result code: %s Failed to send queued message: %s",
+                    result.rc,
+                    e,
                 )
                 # Re-queue the message
                 self._message_queue.appendleft(msg)
                 break
 
     def disconnect(self) -> None:
-        """Disconnect from the MQTT broker."""
-        self.client.loop_stop()
-        log.info(f"Disconnecting from MQTT broker at {self.broker}:{self.port}")
+        """Disconnect from the MQTT broker.
+
+        The broker discards the last will on a clean disconnect, so the
+        offline status is published before disconnecting.
+        """
+        if self.connected:
+            self.publish_status(False)
+        log.info(
+            "Disconnecting from MQTT broker at %s:%s", self.broker, self.port
+        )
         self.client.disconnect()
+        self.client.loop_stop()
 
     def birth(self) -> None:
         """Send a birth message to the MQTT broker."""
         self.publish_status(True)
 
-    @property
-    def is_connected(self) -> bool:
-        """Check if the client is connected to the MQTT broker."""
-        return self._connected
+    def wait_connected(self, timeout: float | None = None) -> bool:
+        """Block until the client is connected to the MQTT broker.
+
+        Args:
+            timeout (float | None): Maximum time to wait in seconds.
+                Defaults to None (wait indefinitely).
+
+        Returns:
+            bool: True if connected, False if the timeout expired.
+        """
+        return self._connected_event.wait(timeout)
 
 
 if __name__ == "__main__":
@@ -382,8 +503,7 @@ if __name__ == "__main__":
             port=1883,
             name="test_client",
         ) as mqtt_client:
-            while not mqtt_client.is_connected:
-                pass
+            mqtt_client.wait_connected()
 
             log.info("Connected! Press Ctrl+C to test last will message...")
 
@@ -411,4 +531,4 @@ if __name__ == "__main__":
 
         sys.exit(1)  # Abrupt exit without clean disconnect
     except Exception as e:
-        log.error(f"An error occurred: {e}")
+        log.error("An error occurred: %s", e)
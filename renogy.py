@@ -2,13 +2,105 @@
 
 import logging
 import os
+import struct
+import time
+from collections.abc import Callable, Iterable
 from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
 
+import minimalmodbus
 from renogymodbus import RenogyChargeController as RCC
 
 log = logging.getLogger(__name__)
 
+# First register and length of the identity and rating register blocks.
+IDENTITY_REGISTERS = (0x00A, 16)  # Covers all of the blocks below
+MODEL_REGISTERS = (0x00C, 8)
+SOFTWARE_VERSION_REGISTERS = (0x014, 2)
+HARDWARE_VERSION_REGISTERS = (0x016, 2)
+SERIAL_NUMBER_REGISTERS = (0x018, 2)
+# voltage and current rating, discharge rating and controller type, one byte
+# each
+RATING_REGISTERS = (0x00A, 2)
+
+# Byte translation table keeping printable ASCII and mapping the rest to ".".
+_PRINTABLE_ASCII = bytes(b if 32 <= b <= 126 else ord(".") for b in range(256))
+
+# Maximum number of registers in a single Modbus read.
+MAX_READ_REGISTERS = 125
+
+
+def _tenths(value: int) -> float:
+    return value / 10
+
+
+def _hundredths(value: int) -> float:
+    return value / 100
+
+
+def _decode_temperature(value: int) -> int:
+    """Decode a temperature byte stored as sign and magnitude.
+
+    Args:
+        value (int): The byte value, bit 7 is the sign.
+
+    Returns:
+        int: The temperature in degrees Celsius.
+    """
+    temperature = value & 0x7F
+    return -temperature if value & 0x80 else temperature
+
+
+def _low_byte_temperature(value: int) -> int:
+    return _decode_temperature(value & 0xFF)
+
+
+def _high_byte_temperature(value: int) -> int:
+    return _decode_temperature(value >> 8)
+
+
+def _register_span(addresses: Iterable[int]) -> tuple[int, int]:
+    """Get the smallest register block covering the given addresses.
+
+    Args:
+        addresses (Iterable[int]): The register addresses to cover.
+
+    Returns:
+        tuple[int, int]: The first register and length of the block.
+
+    Raises:
+        ValueError: If the block is too long for a single Modbus read.
+    """
+    addresses = sorted(addresses)
+    start = addresses[0]
+    length = addresses[-1] - start + 1
+    if length > MAX_READ_REGISTERS:
+        raise ValueError(
+            f"Register block 0x{start:03X}+{length} exceeds "
+            f"{MAX_READ_REGISTERS} registers."
+        )
+    return start, length
+
+
+def _block_offsets(
+    fields: dict[str, tuple[int, Callable[[int], float]]], start: int
+) -> tuple[tuple[str, int, Callable[[int], float]], ...]:
+    """Convert field register addresses to offsets into a register block.
+
+    Args:
+        fields (dict[str, tuple[int, Callable[[int], float]]]): Register
+            address and decoder by field name.
+        start (int): The first register of the block.
+
+    Returns:
+        tuple[tuple[str, int, Callable[[int], float]], ...]: The field name,
+            offset and decoder of each field.
+    """
+    return tuple(
+        (name, address - start, decode)
+        for name, (address, decode) in fields.items()
+    )
+
 
 class RenogyChargeController(RCC):
     """Renogy charge controller with additional methods for MQTT."""
@@ -31,26 +123,46 @@ class RenogyChargeController(RCC):
             self.tz = ZoneInfo(tz_string)
         except Exception as e:
             log.warning(
-                f"Could not determine local timezone from /etc/localtime: {e}. "
-                "Defaulting to UTC."
+                "Could not determine local timezone from /etc/localtime: %s. "
+                "Defaulting to UTC.",
+                e,
             )
             self.tz = timezone.utc
+        # Identity register block, read on first use
+        self._identity: list[int] | None = None
+        # Number of register reads retried since the controller was created
+        self.read_retries = 0
 
-    # Mapping of register names to their addresses and lengths.
-    registers: dict[str, tuple[int, int]] = {
-        "model": (0x00C, 8),
-        "software_version": (0x014, 2),
-        "hardware_version": (0x016, 2),
-        "serial_number": (0x018, 2),
-        "voltage_rating": (0x00A, 1),
-        "current_rating": (0x00A, 1),
-        "discharge_rating": (0x00B, 1),
-        "controller_type": (0x00B, 1),
-    }
+    def _read_identity(self, registers: tuple[int, int]) -> list[int]:
+        """Get registers from the identity block.
+
+        The identity and rating registers never change, so the whole block
+        is read in one transaction on first use and cached until
+        clear_identity_cache() is called.
+
+        Args:
+            registers (tuple[int, int]): The first register and length of the
+                registers to get, within IDENTITY_REGISTERS.
+
+        Returns:
+            list[int]: The register values.
+        """
+        if self._identity is None:
+            self._identity = self.read_registers(*IDENTITY_REGISTERS)
+        start, length = registers
+        offset = start - IDENTITY_REGISTERS[0]
+        return self._identity[offset : offset + length]
+
+    def clear_identity_cache(self) -> None:
+        """Read the identity registers again on the next getter call."""
+        self._identity = None
 
     def _big_endian_decode(self, registers: list[int]) -> str:
         """Decode a list of registers into a string using big-endian format.
 
+        NUL padding is dropped and other non-printable bytes are replaced
+        with ".".
+
         Args:
             registers (list[int]): List of register values to decode.
 
@@ -58,21 +170,11 @@ class RenogyChargeController(RCC):
             str: The decoded string from the registers.
         """
         try:
-            # Convert list of integers to bytes, then decode
-            byte_data = bytearray()
-            for reg in registers:
-                # Each register is 16 bits, split into 2 bytes (big-endian)
-                high_byte = (reg >> 8) & 0xFF
-                low_byte = reg & 0xFF
-                byte_data.extend([high_byte, low_byte])
-            # Convert bytes to ASCII
-            ascii_chars = []
-            for byte_val in byte_data:
-                ascii_chars.append(chr(byte_val))
-            return "".join(ascii_chars)
-
-        except Exception as e:
-            log.error(f"Error decoding registers: {e}")
+            # Each register holds two characters, high byte first
+            raw = struct.pack(f">{len(registers)}H", *registers)
+            return raw.translate(_PRINTABLE_ASCII, b"\x00").decode("ascii")
+        except struct.error as e:
+            log.error("Error decoding registers: %s", e)
             return ""
 
     def get_model(self) -> str:
@@ -81,8 +183,7 @@ class RenogyChargeController(RCC):
         Returns:
             str: The model of the charge controller.
         """
-        # Read registers and convert to bytes, then decode
-        registers = self.read_registers(*self.registers["model"])
+        registers = self._read_identity(MODEL_REGISTERS)
         return self._big_endian_decode(registers).strip(" ")
 
     def get_software_version(self) -> str:
@@ -91,9 +192,9 @@ class RenogyChargeController(RCC):
         Returns:
             str: The software version of the charge controller.
         """
-        registers = self.read_registers(*self.registers["software_version"])
+        registers = self._read_identity(SOFTWARE_VERSION_REGISTERS)
         # Combine two 16-bit registers into 4 bytes
-        b = registers[0].to_bytes(2, "big") + registers[1].to_bytes(2, "big")
+        b = struct.pack(">HH", *registers)
         return f"V{b[1]}.{b[2]}.{b[3]}"
 
     def get_hardware_version(self) -> str:
@@ -102,8 +203,8 @@ class RenogyChargeController(RCC):
         Returns:
             str: The hardware version of the charge controller.
         """
-        registers = self.read_registers(*self.registers["hardware_version"])
-        b = registers[0].to_bytes(2, "big") + registers[1].to_bytes(2, "big")
+        registers = self._read_identity(HARDWARE_VERSION_REGISTERS)
+        b = struct.pack(">HH", *registers)
         return f"V{b[1]}.{b[2]}.{b[3]}"
 
     def get_serial_number(self) -> int:
@@ -112,42 +213,32 @@ class RenogyChargeController(RCC):
         Returns:
             int: The serial number of the charge controller as an integer.
         """
-        registers = self.read_registers(*self.registers["serial_number"])
-        serial_hex = f"{registers[0]:04x}{registers[1]:04x}"
-        return int(serial_hex, 16)
+        high, low = self._read_identity(SERIAL_NUMBER_REGISTERS)
+        return (high << 16) | low
 
     def get_controller_voltage_rating(self) -> int:
-        """Get the controller voltage rating.
+        """Get the controller voltage rating (from register 0x00A, high byte).
 
         Returns:
             int: The voltage rating of the controller.
         """
-        registers = self.read_registers(*self.registers["voltage_rating"])
-        value = registers[0]
-        voltage = (value >> 8) & 0xFF
-        return voltage
+        return self._read_identity(RATING_REGISTERS)[0] >> 8
 
     def get_controller_current_rating(self) -> int:
-        """Get the controller current rating.
+        """Get the controller current rating (from register 0x00A, low byte).
 
         Returns:
             int: The current rating of the controller.
         """
-        registers = self.read_registers(*self.registers["current_rating"])
-        value = registers[0]
-        current = value & 0xFF
-        return current
+        return self._read_identity(RATING_REGISTERS)[0] & 0xFF
 
     def get_controller_discharge_rating(self) -> int:
-        """Get the controller discharge current rating.
+        """Get the discharge current rating (from register 0x00B, high byte).
 
         Returns:
             int: The discharge current rating of the controller.
         """
-        registers = self.read_registers(*self.registers["discharge_rating"])
-        value = registers[0]
-        discharge = (value >> 8) & 0xFF
-        return discharge
+        return self._read_identity(RATING_REGISTERS)[1] >> 8
 
     def get_controller_type(self) -> str:
         """Get the controller type (from register 0x00B, low byte).
@@ -155,11 +246,90 @@ class RenogyChargeController(RCC):
         Returns:
             str: The type of the controller, either "Controller" or "Inverter".
         """
-        registers = self.read_registers(*self.registers["controller_type"])
-        value = registers[0]
-        controller_type = value & 0xFF
+        controller_type = self._read_identity(RATING_REGISTERS)[1] & 0xFF
         return "Controller" if controller_type == 0 else "Inverter"
 
+    # Real-time data fields: register address and decoder for the raw value,
+    # using the same scaling as the individual getters.
+    data_fields: dict[str, tuple[int, Callable[[int], float]]] = {
+        "solar_voltage": (0x107, _tenths),
+        "solar_current": (0x108, _hundredths),
+        "solar_power": (0x109, int),
+        "load_voltage": (0x104, _tenths),
+        "load_current": (0x105, _hundredths),
+        "load_power": (0x106, int),
+        "battery_voltage": (0x101, _tenths),
+        "battery_state_of_charge": (0x100, int),
+        "battery_temperature": (0x103, _low_byte_temperature),
+        "controller_temperature": (0x103, _high_byte_temperature),
+        "maximum_solar_power_today": (0x10F, int),
+        "minimum_solar_power_today": (0x110, int),
+        "maximum_battery_voltage_today": (0x10C, _tenths),
+        "minimum_battery_voltage_today": (0x10B, _tenths),
+    }
+
+    # First register and length of the block covering all data fields.
+    data_block: tuple[int, int] = _register_span(
+        address for address, _ in data_fields.values()
+    )
+
+    # (name, offset into the data block, decoder) for each data field
+    _data_decoders = _block_offsets(data_fields, data_block[0])
+
+    def _read_with_retry(
+        self, address: int, count: int, retries: int = 3, backoff: float = 0.02
+    ) -> list[int]:
+        """Read registers, retrying transient failures with backoff.
+
+        A missing or corrupt response is retried after backoff seconds,
+        doubling the wait for every further attempt.
+
+        Args:
+            address (int): The first register to read.
+            count (int): The number of registers to read.
+            retries (int): The number of retries. Defaults to 3.
+            backoff (float): The wait before the first retry in seconds.
+                Defaults to 0.02.
+
+        Returns:
+            list[int]: The register values.
+
+        Raises:
+            minimalmodbus.NoResponseError: If the last attempt got no response.
+            minimalmodbus.InvalidResponseError: If the last attempt got an
+                invalid response.
+        """
+        for attempt in range(retries):
+            try:
+                return self.read_registers(address, count)
+            except (
+                minimalmodbus.NoResponseError,
+                minimalmodbus.InvalidResponseError,
+            ) as e:
+                self.read_retries += 1
+                log.debug(
+                    "Reading %s registers at 0x%03X failed, retrying: %s",
+                    count,
+                    address,
+                    e,
+                )
+                time.sleep(backoff * 2**attempt)
+        return self.read_registers(address, count)
+
+    def _read_block(self) -> dict:
+        """Read and decode the real-time data block.
+
+        All data fields are read in a single Modbus transaction.
+
+        Returns:
+            dict: The decoded real-time values, keyed by field name.
+        """
+        r = self._read_with_retry(*self.data_block)
+        return {
+            name: decode(r[offset])
+            for name, offset, decode in self._data_decoders
+        }
+
     def get_data(self) -> dict:
         """Get all relevant data from the charge controller.
 
@@ -169,24 +339,7 @@ class RenogyChargeController(RCC):
         """
         return {
             "timestamp": datetime.now(self.tz).isoformat(),
-            "solar_voltage": self.get_solar_voltage(),
-            "solar_current": self.get_solar_current(),
-            "solar_power": self.get_solar_power(),
-            "load_voltage": self.get_load_voltage(),
-            "load_current": self.get_load_current(),
-            "load_power": self.get_load_power(),
-            "battery_voltage": self.get_battery_voltage(),
-            "battery_state_of_charge": self.get_battery_state_of_charge(),
-            "battery_temperature": self.get_battery_temperature(),
-            "controller_temperature": self.get_controller_temperature(),
-            "maximum_solar_power_today": self.get_maximum_solar_power_today(),
-            "minimum_solar_power_today": self.get_minimum_solar_power_today(),
-            "maximum_battery_voltage_today": (
-                self.get_maximum_battery_voltage_today()
-            ),
-            "minimum_battery_voltage_today": (
-                self.get_minimum_battery_voltage_today()
-            ),
+            **self._read_block(),
         }
 
 
@@ -3,8 +3,12 @@
 
 import logging
 
+import minimalmodbus
+import serial
+
 from mqtt import MQTTClient, QoSLevel
 from renogy import RenogyChargeController
+from util import call_periodically, set_low_latency
 
 log = logging.getLogger(__name__)
 
@@ -12,6 +16,26 @@ log = logging.getLogger(__name__)
 class RenogyChargeControllerMQTTClient(MQTTClient):
     """A simple MQTT client for publishing Renogy data."""
 
+    __slots__ = (
+        "charge_controller",
+        "model",
+        "software_version",
+        "hardware_version",
+        "serial_number",
+        "voltage_rating",
+        "current_rating",
+        "discharge_rating",
+        "controller_type",
+        "data_topic",
+        "qos",
+        "full_publish_interval",
+        "_publish_count",
+        "_last_data",
+        "_published_read_retries",
+        "_data_publish_topic",
+        "_stats_publish_topic",
+    )
+
     def __init__(
         self,
         broker: str,
@@ -21,6 +45,7 @@ class RenogyChargeControllerMQTTClient(MQTTClient):
         device_address: str = "/dev/ttyUSB0",
         qos: QoSLevel = 0,
         max_queue_size: int = 1000,
+        full_publish_interval: int = 1,
     ) -> None:
         """Initialize the MQTT client.
 
@@ -34,14 +59,48 @@ class RenogyChargeControllerMQTTClient(MQTTClient):
                 connected. Defaults to "/dev/ttyUSB0".
             qos (QoSLevel): Quality of Service level for the MQTT data messages.
                 Defaults to 0 (at most once).
-            max_queue_size (int): Maximum size of the message queue. Defaults to
-                1000. If the queue is full, older messages will be discarded
-                to make room for new messages.
+            max_queue_size (int): Maximum number of outgoing messages paho
+                queues. Defaults to 1000. When the queue is full, new messages
+                are rejected by paho and dropped. QoS 0 messages are not
+                queued while disconnected, see MQTTClient.
+            full_publish_interval (int): Publish all fields every this many
+                publishes. In between, only the timestamp and the fields that
+                changed since the last publish are sent, and nothing at all
+                when no field changed. Defaults to 1 (always publish all
+                fields).
+
+        Raises:
+            ValueError: If full_publish_interval is less than 1.
         """
+        if full_publish_interval < 1:
+            raise ValueError("full_publish_interval must be at least 1.")
         self.charge_controller = RenogyChargeController(
             slave_address=slave_address, device_address=device_address
         )
-        # retrieve charge controller information
+        if self.charge_controller.serial is not None:
+            set_low_latency(self.charge_controller.serial)
+        self._read_static_metadata()
+
+        super().__init__(
+            broker,
+            port,
+            name,
+            base_topic="solar",
+            keepalive=60,
+            max_queue_size=max_queue_size,
+        )
+        self.data_topic = "data"
+        # Topics passed to publish_json(), relative to the base topic
+        self._data_publish_topic = f"{self.name}/{self.data_topic}"
+        self._stats_publish_topic = f"{self.name}/stats"
+        self.qos: QoSLevel = qos
+        self.full_publish_interval = full_publish_interval
+        self._publish_count = 0
+        self._last_data: dict = {}
+        self._published_read_retries: int | None = None
+
+    def _read_static_metadata(self) -> None:
+        """Read the charge controller information that does not change."""
         self.model = self.charge_controller.get_model()
         self.software_version = self.charge_controller.get_software_version()
         self.hardware_version = self.charge_controller.get_hardware_version()
@@ -57,16 +116,19 @@ class RenogyChargeControllerMQTTClient(MQTTClient):
         )
         self.controller_type = self.charge_controller.get_controller_type()
 
-        super().__init__(
-            broker,
-            port,
-            name,
-            base_topic="solar",
-            keepalive=60,
-            max_queue_size=max_queue_size,
-        )
-        self.data_topic = "data"
-        self.qos: QoSLevel = qos
+    def refresh_static_metadata(self) -> None:
+        """Re-read the charge controller information.
+
+        The information is read once when the client is created. Call this
+        after the charge controller was replaced or reconfigured to update
+        the status messages. The online status is republished right away if
+        connected; the new last will takes effect on the next reconnect.
+        """
+        self.charge_controller.clear_identity_cache()
+        self._read_static_metadata()
+        self._cache_status_payloads()
+        if self.connected:
+            self.birth()
 
     def status_message(self, status: bool) -> dict:
         """Create a status message for the MQTT topic.
@@ -91,22 +153,79 @@ class RenogyChargeControllerMQTTClient(MQTTClient):
             "type": self.controller_type,
         }
 
+    def _changed_data(self, data: dict) -> dict:
+        """Select the fields of a data reading to publish.
+
+        Fields are compared with the last data that was actually published,
+        so changes read while a publish failed are sent with the next one.
+
+        Args:
+            data (dict): The data read from the charge controller.
+
+        Returns:
+            dict: The fields to publish, empty if there is nothing to publish.
+        """
+        full = self._publish_count % self.full_publish_interval == 0
+        self._publish_count += 1
+        if full:
+            return data
+        changed = {
+            key: value
+            for key, value in data.items()
+            if key == "timestamp" or self._last_data.get(key) != value
+        }
+        if changed.keys() == {"timestamp"}:
+            return {}
+        return changed
+
     def publish_data(self) -> None:
-        """Publish data from the charge controller to the MQTT broker."""
+        """Publish data from the charge controller to the MQTT broker.
+
+        When only changed fields are published, publishes with all fields
+        are retained so that new subscribers get the complete last state.
+        """
         try:
-            self.publish_json(
-                self.charge_controller.get_data(),
-                f"{self.name}/{self.data_topic}",
+            reading = self.charge_controller.get_data()
+        except (
+            minimalmodbus.ModbusException,
+            serial.SerialException,
+            OSError,
+        ) as e:
+            # Read errors are expected on a flaky serial link, skip this
+            # reading. Anything else is a bug and is left to propagate.
+            log.error("Error reading data: %s", e)
+        else:
+            data = self._changed_data(reading)
+            if not data:
+                log.debug("Data unchanged since last publish, skipping.")
+            elif self.publish_json(
+                data,
+                self._data_publish_topic,
                 qos=self.qos,
-            )
-        except Exception as e:
-            log.error(f"Error publishing data: {e}")
+                retain=(
+                    self.full_publish_interval > 1 and len(data) == len(reading)
+                ),
+            ):
+                self._last_data = reading
+        self._publish_stats()
+
+    def _publish_stats(self) -> None:
+        """Publish the charge controller read statistics when they change."""
+        read_retries = self.charge_controller.read_retries
+        if read_retries == self._published_read_retries or not self.connected:
+            return
+        if self.publish_json(
+            {"read_retries": read_retries},
+            self._stats_publish_topic,
+            qos=1,
+            retain=True,
+        ):
+            self._published_read_retries = read_retries
 
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     log.info("Starting Renogy MQTT client...")
-    import time
 
     # Initialize the MQTT client
     mqtt_client = RenogyChargeControllerMQTTClient(
@@ -119,13 +238,10 @@ if __name__ == "__main__":
 
     # Connect to the MQTT broker
     mqtt_client.connect()
+    mqtt_client.wait_connected()
 
     # Publish data periodically
-    while True:
-        try:
-            mqtt_client.publish_data()
-            log.info("Data published to MQTT broker.")
-        except Exception as e:
-            log.error(f"Error publishing data: {e}")
-        finally:
-            time.sleep(10)
+    try:
+        call_periodically(mqtt_client.publish_data, 10)
+    except KeyboardInterrupt:
+        mqtt_client.disconnect()
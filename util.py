@@ -1,44 +1,97 @@
 """Utility functions for the Renogy MQTT client application."""
 
+from __future__ import annotations
+
 import logging
+import os
+import threading
 import time
-from typing import Callable
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    import serial
 
 log = logging.getLogger(__name__)
 
 
-def call_periodically(function: Callable, interval: float) -> None:
+def set_low_latency(port: serial.Serial) -> None:
+    """Set the USB latency timer of a FTDI serial port to 1 ms.
+
+    The FTDI driver holds back received data for up to 16 ms by default,
+    which adds that delay to every Modbus transaction. The sysfs latency timer
+    is tried first, then the ASYNC_LOW_LATENCY flag (as set by
+    `setserial low_latency`). Failures are logged and otherwise ignored.
+
+    Args:
+        port (serial.Serial): The open serial port.
+    """
+    name = os.path.basename(os.path.realpath(port.port))
+    latency_timer = f"/sys/bus/usb-serial/devices/{name}/latency_timer"
+    try:
+        with open(latency_timer, "w") as f:
+            f.write("1")
+        log.debug("Set latency timer of %s to 1 ms", port.port)
+        return
+    except OSError as e:
+        log.debug("Could not write %s: %s", latency_timer, e)
+
+    try:
+        port.set_low_latency_mode(True)  # Only available on Linux
+        log.debug("Enabled low latency mode for %s", port.port)
+    except (AttributeError, OSError, ValueError) as e:
+        log.warning(
+            "Could not enable low latency mode for %s: %s", port.port, e
+        )
+
+
+def call_periodically(
+    function: Callable,
+    interval: float,
+    stop_event: threading.Event | None = None,
+) -> None:
     """Call a function periodically with a specified interval.
 
     This function will execute the provided function at regular intervals,
     logging an error if the function execution time exceeds the interval.
+    The schedule follows the monotonic clock, so wall clock adjustments do not
+    shift it.
 
     Args:
         function (Callable): The function to call periodically.
         interval (float): The interval in seconds between calls.
+        stop_event (threading.Event | None): If given, the loop returns as
+            soon as the event is set, including while waiting for the next
+            call. Defaults to None (run forever).
     """
-    next_run = time.time()
-    while True:
-        start_time = time.time()
+    if stop_event is None:
+        stop_event = threading.Event()
+    # Calls are scheduled at start + tick * interval rather than by adding
+    # the interval up, so rounding errors do not accumulate over long runs.
+    start = time.monotonic()
+    tick = 0
+    while not stop_event.is_set():
+        start_time = time.monotonic()
         function()
-        elapsed = time.time() - start_time
-        next_run += interval
-        sleep_time = next_run - time.time()
+        elapsed = time.monotonic() - start_time
+        tick += 1
+        sleep_time = start + tick * interval - time.monotonic()
         if sleep_time < 0:
             log.error(
-                f"Function execution time ({elapsed}s) "
-                f"exceeded interval ({interval}s)."
+                "Function execution time (%ss) exceeded interval (%ss).",
+                elapsed,
+                interval,
             )
-            next_run = time.time()  # Reset next_run to avoid accumulating drift
+            # Restart the schedule to avoid a burst of catch-up calls
+            start = time.monotonic()
+            tick = 0
             sleep_time = 0
-        time.sleep(sleep_time)
+        stop_event.wait(sleep_time)
 
 
 if __name__ == "__main__":
     logging.basicConfig(
         level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
     )
-    import time
 
     # Example usage
     def example_function() -> None: